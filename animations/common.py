@@ -3,6 +3,8 @@
 # common.py
 # Common animation definitions
 
+from common.args import args
+from common.common import pascal_to_snake
 from common.field import *
 from animations.flags import *
 from animations.tables import KeyType, KeyFrameBase
@@ -33,3 +35,72 @@ def get_enabled_targets(sub_targets: IntFlag):
 # Checks if the only available target is enabled
 def has_single_target(self: Structure, _) -> bool:
     return self.t is not None
+
+# Adds an entry to a table of the owner structure without duplicates, returning its index
+# The indexes map each entry of the table to its index, and is updated accordingly
+def add_unique_entry(owner: Structure, entries: list[Structure], indexes: dict[Structure, int], entry: Structure) -> int:
+    if entry not in indexes:
+        indexes[entry] = len(entries)
+        entries.append(entry)
+        owner.invalidate()
+    return indexes[entry]
+
+# Checks if baked frames should be stored as arrays
+def use_frame_arrays() -> bool:
+    return args.numpy and get_numpy() is not None
+
+# Gets the JSON keys of the enabled targets of a baked frame, in the order of the frame structure's fields
+def get_frame_keys(frame_type: Type[Structure], sub_targets: IntFlag) -> list[str]:
+    names = {pascal_to_snake(target_name) for _, target_name, _ in get_enabled_targets(sub_targets)}
+    return [frame_type._keys_[name] for name in frame_type._fields_ if name in names]
+
+# Checks that columnar frames have one column for each enabled target, all of the same length
+def check_frame_columns(columns: dict[str, list[Any]], keys: list[str], parent: Optional[Structure]) -> None:
+    target = get_anim_header(parent).target
+    if set(columns) != set(keys):
+        raise ValueError(f'Expected frame columns {", ".join(keys)} for animation {target}, got {", ".join(columns)}')
+    if len({len(column) for column in columns.values()}) > 1:
+        raise ValueError(f'Frame columns of animation {target} have different lengths')
+
+# Baked frames stored as a list of frame structures
+# In JSON, the frames are either a list of objects (one per frame) or an object of lists (one per target)
+class FrameListField(ListField):
+    def __init__(self, frame_type: Type[Structure], sub_targets: IntFlag, **kwargs) -> None:
+        super().__init__(StructField(frame_type, unroll=True), **kwargs)
+        self.json_keys = get_frame_keys(frame_type, sub_targets)
+
+    def to_json(self, value: list) -> list[dict[str, Any]] | dict[str, list[Any]]:
+        rows = super().to_json(value)
+        if args.columnar:
+            return {key: [row[key] for row in rows] for key in self.json_keys}
+        return rows
+
+    def from_json(self, value: list[dict[str, Any]] | dict[str, list[Any]], parent: Optional[Structure] = None) -> list:
+        if isinstance(value, dict):
+            check_frame_columns(value, self.json_keys, parent)
+            value = [dict(zip(value, row)) for row in zip(*value.values())]
+        return super().from_json(value, parent)
+
+# Baked frames stored as an array, with a column for each enabled target
+class FrameTableField(Field):
+    def __init__(self, frame_type: Type[Structure], item_field: Field, sub_targets: IntFlag, **kwargs) -> None:
+        super().__init__('', None, lambda: self.numpy.empty((0, len(self.column_keys)), self.dtype), **kwargs)
+        self.numpy = get_numpy()
+        self.dtype = self.numpy.dtype(item_field.fmt)
+
+        # The columns follow the target order, while the JSON keys follow the order of the frame structure's fields
+        columns = [pascal_to_snake(target_name) for _, target_name, _ in get_enabled_targets(sub_targets)]
+        self.column_keys = [frame_type._keys_[name] for name in columns]
+        self.json_keys = [(key, self.column_keys.index(key)) for key in get_frame_keys(frame_type, sub_targets)]
+
+    def to_json(self, value: Any) -> list[dict[str, Any]] | dict[str, list[Any]]:
+        if args.columnar:
+            return {key: value[:, i].tolist() for key, i in self.json_keys}
+        return [{key: row[i] for key, i in self.json_keys} for row in value.tolist()]
+
+    def from_json(self, value: list[dict[str, Any]] | dict[str, list[Any]], parent: Optional[Structure] = None) -> Any:
+        if isinstance(value, dict):
+            check_frame_columns(value, [key for key, _ in self.json_keys], parent)
+            return self.numpy.array([value[key] for key in self.column_keys], self.dtype).T
+        rows = [[frame[key] for key in self.column_keys] for frame in value]
+        return self.numpy.array(rows, self.dtype).reshape(len(rows), len(self.column_keys))
@@ -113,3 +113,13 @@ class AnimationHeader(Structure):
     info_table_size = u32(default=0, cond=skip_json)
 
     data = UnionField(get_anim_data)
+
+    def invalidate(self) -> None:
+        super().invalidate()
+
+        # The binary conditions of the animation data (and of the nested frames in Field/PostField animations)
+        # depend on the header's values, so their layouts must be invalidated as well
+        data = self.data
+        while isinstance(data, Structure):
+            data.invalidate()
+            data = getattr(data, 'frames', None)
@@ -64,9 +64,24 @@ class KeyCurve(Structure):
 ##############
 
 class NameTable(AnimDataTable):
+    __slots__ = ('indexes',)
+
     name_ptrs = ListField(u32(), AnimDataTable.entry_count)
     names = ListField(StructField(NameString), AnimDataTable.entry_count)
 
+    def __init__(self, parent: Optional[Structure] = None) -> None:
+        super().__init__(parent)
+        self.indexes: Optional[dict[str, int]] = None
+
+    def get_indexes(self) -> dict[str, int]:
+
+        # Map each name to the index of its first occurrence, building the map on first use
+        if self.indexes is None:
+            self.indexes = {}
+            for i, name in enumerate(self.names):
+                self.indexes.setdefault(name.name, i)
+        return self.indexes
+
     def encode(self) -> None:
         self.entry_count = len(self.names)
         self.name_ptrs = [0] * len(self.names)
@@ -75,12 +90,14 @@ class NameTable(AnimDataTable):
     def add_entry(self, entry_name: str) -> int:
 
         # First check if it's already there
-        for i, name in enumerate(self.names):
-            if name.name == entry_name:
-                return i
+        indexes = self.get_indexes()
+        if entry_name in indexes:
+            return indexes[entry_name]
 
         # Else add it
         new_entry = NameString(self)
         new_entry.name = entry_name
         self.names.append(new_entry)
-        return len(self.names) - 1
+        self.invalidate()
+        indexes[entry_name] = len(self.names) - 1
+        return indexes[entry_name]
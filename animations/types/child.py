@@ -50,11 +50,7 @@ class AnimationChildParam(Structure):
 
 # Used as part of the randomization algorithm, value is the index into the key list
 class AnimationChildRandomKey(Structure):
-    idx = u16('H10x', cond=skip_json)
-
-    def encode(self) -> None:
-        self.idx = self.get_parent(AnimationChild).frames.index(self.parent)
-        super().encode()
+    idx = u16('H10x', cond=skip_json) # Set by AnimationChild
 
 
 class AnimationChildKeyFrame(KeyFrameBase):
@@ -95,6 +91,11 @@ class AnimationChild(Structure):
         self.frame_table.entry_count = len(self.frames)
         anim_header.key_table_size = self.size(end_field=AnimationChild.frames)
 
+        # Point each random key to its own index
+        for i, frame in enumerate(self.frames):
+            if frame.value_type == KeyType.Random:
+                frame.data.idx = i
+
         # Set random table length and size (if applicable)
         if self.random_pool:
             self.random_table = AnimDataTable(self)
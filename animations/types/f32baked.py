@@ -151,15 +151,31 @@ class AnimationF32Baked(Structure):
     def get_key_count(self) -> int:
         return get_anim_header(self).frame_count
 
-    keys = ListField(StructField(AnimationF32BakedKey), get_key_count, cond=skip_json)
-    frames = ListField(StructField(AnimationF32BakedFrame, unroll=True), cond=skip_binary) # Parsed version
+    def get_keys(self, is_json: bool) -> Field:
+        if use_frame_arrays():
+            return ArrayField(f32(), AnimationF32Baked.get_key_count, get_sub_target_count)
+        return ListField(StructField(AnimationF32BakedKey), AnimationF32Baked.get_key_count)
+
+    def get_frames(self, is_json: bool) -> Field:
+        if use_frame_arrays():
+            return FrameTableField(AnimationF32BakedFrame, f32(), get_anim_header(self).sub_targets)
+        return FrameListField(AnimationF32BakedFrame, get_anim_header(self).sub_targets)
+
+    keys = UnionField(get_keys, cond=skip_json)
+    frames = UnionField(get_frames, cond=skip_binary) # Parsed version
 
     def decode(self) -> None:
 
+        # Store the frames as is if they are an array, since the key columns match the enabled targets
+        if isinstance(AnimationF32Baked.frames.detect_field(self, True), FrameTableField):
+            self.frames = self.keys
+            return super().decode()
+
         # Get the targets and the parameter names that might be necessary
         sub_targets = get_anim_header(self).sub_targets
 
         # Parse each frame
+        self.frames = []
         for key in self.keys:
 
             # Parse the enabled targets
@@ -179,17 +195,21 @@ class AnimationF32Baked(Structure):
         anim_header = get_anim_header(self)
         sub_targets = anim_header.sub_targets
 
-        # Parse each frame
-        for frame in self.frames:
-
-            # Parse the enabled targets
-            key = AnimationF32BakedKey(self)
-            for target in sub_targets:
-                value = getattr(frame, pascal_to_snake(target.name))
-                key.values.append(value)
-
-            # Add the parsed frame to the list
-            self.keys.append(key)
+        # Store the keys as is if they are an array, else parse each frame
+        if isinstance(AnimationF32Baked.keys.detect_field(self, False), ArrayField):
+            self.keys = self.frames
+        else:
+            self.keys = []
+            for frame in self.frames:
+
+                # Parse the enabled targets
+                key = AnimationF32BakedKey(self)
+                for target in sub_targets:
+                    value = getattr(frame, pascal_to_snake(target.name))
+                    key.values.append(value)
+
+                # Add the parsed frame to the list
+                self.keys.append(key)
 
         # Calculate key table size and encode the result
         anim_header.frame_count = len(self.keys)
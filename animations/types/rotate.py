@@ -179,6 +179,7 @@ class AnimationRotate(Structure):
         # Get the enabled targets
         anim_header = get_anim_header(self)
         sub_targets = anim_header.sub_targets
+        range_indexes: dict[AnimationRotateRanges, int] = {}
         random_idx = 0
 
         # Parse the individual frames
@@ -218,7 +219,7 @@ class AnimationRotate(Structure):
                     range.values += target.range
 
                 # Get the index in the range table and fill the padding
-                data.idx = self.add_range(range)
+                data.idx = add_unique_entry(self, self.range_values, range_indexes, range)
                 data.padd = [0] * data.get_padding()
 
             # Random frame
@@ -268,11 +269,3 @@ class AnimationRotate(Structure):
 
         # Do encoding
         super().encode()
-
-    def add_range(self, range: AnimationRotateRanges) -> int:
-        for i, entry in enumerate(self.range_values):
-            if range.values == entry.values and range.random_rotation_direction == entry.random_rotation_direction:
-                return i
-
-        self.range_values.append(range)
-        return len(self.range_values) - 1
@@ -38,15 +38,6 @@ class AnimationTexParam(Structure):
         self.wrap = self.wrapS.value | (self.wrapT.value << 2)
         super().encode()
 
-    def __eq__(self, other):
-        if isinstance(other, self.__class__):
-            return self.texture_name == other.texture_name and \
-                   self.wrapS == other.wrapS and \
-                   self.wrapT == other.wrapT and \
-                   self.reverse_mode == other.reverse_mode
-        else:
-            return False
-
 
 class AnimationTexRangeRandomKey(Structure):
     idx = u16('H2x')
@@ -68,12 +59,6 @@ class AnimationTexRange(Structure):
     flip_random = FlagEnumField(FlipRandom)
     padd = padding(3)
 
-    def __eq__(self, other):
-        if isinstance(other, self.__class__):
-            return self.param == other.param and self.flip_random == other.flip_random
-        else:
-            return False
-
 ##################
 # Parsed Formats #
 ##################
@@ -147,6 +132,7 @@ class AnimationTex(Structure):
     def encode(self) -> None:
 
         # Iterate frames
+        range_indexes: dict[AnimationTexRange, int] = {}
         random_idx = 0
         for frame in self.frames:
 
@@ -168,7 +154,7 @@ class AnimationTex(Structure):
                 range_entry.param = frame.data
                 range_entry.flip_random = frame.flip_random
                 key.data = AnimationTexRangeRandomKey(key)
-                key.data.idx = self.add_range(range_entry)
+                key.data.idx = add_unique_entry(self, self.ranges, range_indexes, range_entry)
 
             # Random frame
             else:
@@ -203,11 +189,3 @@ class AnimationTex(Structure):
 
         # Calculate name table size
         anim_header.name_table_size = self.size(AnimationTex.name_table)
-
-    def add_range(self, new_range: AnimationTexRange) -> int:
-        for i, range in enumerate(self.ranges):
-            if new_range == range:
-                return i
-
-        self.ranges.append(new_range)
-        return len(self.ranges) - 1
@@ -169,6 +169,7 @@ class AnimationU8(Structure):
         # Get the enabled targets
         anim_header = get_anim_header(self)
         sub_targets = anim_header.sub_targets
+        range_indexes: dict[AnimationU8Ranges, int] = {}
         random_idx = 0
 
         # Parse the individual frames
@@ -205,7 +206,7 @@ class AnimationU8(Structure):
                     range.values += target.range
 
                 # Get the index in the range table and fill the padding
-                data.idx = self.add_range(range)
+                data.idx = add_unique_entry(self, self.range_values, range_indexes, range)
                 data.padd = [0] * data.get_padding()
 
             # Random frame
@@ -252,11 +253,3 @@ class AnimationU8(Structure):
 
         # Do encoding
         super().encode()
-
-    def add_range(self, range: AnimationU8Ranges) -> int:
-        for i, entry in enumerate(self.range_values):
-            if range.values == entry.values:
-                return i
-
-        self.range_values.append(range)
-        return len(self.range_values) - 1
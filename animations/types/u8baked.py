@@ -42,12 +42,28 @@ class AnimationU8Baked(Structure):
     def get_key_count(self) -> int:
         return get_anim_header(self).frame_count
 
-    keys = ListField(StructField(AnimationU8BakedKey), get_key_count, alignment=4, cond=skip_json)
-    frames = ListField(StructField(AnimationU8BakedFrame, unroll=True), cond=skip_binary) # Parsed version
+    def get_keys(self, is_json: bool) -> Field:
+        if use_frame_arrays():
+            return ArrayField(u8(), AnimationU8Baked.get_key_count, get_sub_target_count, alignment=4)
+        return ListField(StructField(AnimationU8BakedKey), AnimationU8Baked.get_key_count, alignment=4)
+
+    def get_frames(self, is_json: bool) -> Field:
+        if use_frame_arrays():
+            return FrameTableField(AnimationU8BakedFrame, u8(), get_anim_header(self).sub_targets)
+        return FrameListField(AnimationU8BakedFrame, get_anim_header(self).sub_targets)
+
+    keys = UnionField(get_keys, alignment=4, cond=skip_json)
+    frames = UnionField(get_frames, cond=skip_binary) # Parsed version
 
     def decode(self) -> None:
 
+        # Store the frames as is if they are an array, since the key columns match the enabled targets
+        if isinstance(AnimationU8Baked.frames.detect_field(self, True), FrameTableField):
+            self.frames = self.keys
+            return super().decode()
+
         # Parse each frame
+        self.frames = []
         sub_targets = get_anim_header(self).sub_targets
         for key in self.keys:
 
@@ -68,17 +84,21 @@ class AnimationU8Baked(Structure):
         anim_header = get_anim_header(self)
         sub_targets = anim_header.sub_targets
 
-        # Parse each frame
-        for frame in self.frames:
-
-            # Parse the enabled targets
-            key = AnimationU8BakedKey(self)
-            for target in sub_targets:
-                value = getattr(frame, pascal_to_snake(target.name))
-                key.values.append(value)
-
-            # Add the parsed frame to the list
-            self.keys.append(key)
+        # Store the keys as is if they are an array, else parse each frame
+        if isinstance(AnimationU8Baked.keys.detect_field(self, False), ArrayField):
+            self.keys = self.frames
+        else:
+            self.keys = []
+            for frame in self.frames:
+
+                # Parse the enabled targets
+                key = AnimationU8BakedKey(self)
+                for target in sub_targets:
+                    value = getattr(frame, pascal_to_snake(target.name))
+                    key.values.append(value)
+
+                # Add the parsed frame to the list
+                self.keys.append(key)
 
         # Calculate key table length and size
         anim_header.frame_count = len(self.keys)
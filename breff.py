@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+
+# breff.py
+# Library interface to convert BREFF files to JSON and back without the command line
+
+from typing import Any, Optional
+from common.args import override_args
+from common.field import Buffer
+from common.nw4r import NameString
+from effect.effect import BinaryFileHeader, EffectTable, EffectTableEntry, Effect
+from effect.index import EffectIndex
+
+def add_effect(effect_table: EffectTable, name: str, data: bytes) -> None:
+    """
+    Adds an effect at the end of an effect table.
+
+    :param effect_table: The effect table.
+    :param name: The effect's name.
+    :param data: The encoded effect data.
+    """
+    effect_table_entry = EffectTableEntry(effect_table)
+    effect_table_entry.data = data
+    effect_table_entry.name = NameString(effect_table_entry)
+    effect_table_entry.name.name = name
+    effect_table.entries.append(effect_table_entry)
+
+
+def pack_effects(header: BinaryFileHeader, effects: list[tuple[str, bytes]]) -> bytes:
+    """
+    Builds a BREFF file from its header and encoded effects.
+
+    :param header: The file header. Its project data is replaced by the new effect table.
+    :param effects: The names and encoded data of the effects, in table order.
+    """
+    effect_table = EffectTable()
+    for name, effect in effects:
+        add_effect(effect_table, name, effect)
+
+    # Encode the effect table and insert it into the project
+    header.block.project.project_data = effect_table.to_bytes()
+    return header.to_bytes()
+
+
+def decode_effect(data: Buffer, **options: Any) -> dict[str, Any]:
+    """
+    Converts an effect to JSON.
+
+    :param data: The encoded effect data.
+    :param options: The options to use, named after the command line options (such as numpy or columnar).
+    """
+    with override_args(**options):
+        return Effect.from_bytes(data)[0].to_json()
+
+
+def encode_effect(effect: dict[str, Any], **options: Any) -> bytes:
+    """
+    Converts an effect from JSON.
+
+    :param effect: The effect's JSON data.
+    :param options: The options to use, named after the command line options (such as numpy or columnar).
+    """
+    with override_args(**options):
+        return Effect.from_json(effect).to_bytes()
+
+
+def decode_bytes(data: Buffer, names: Optional[list[str]] = None,
+                 **options: Any) -> tuple[dict[str, Any], dict[str, dict[str, Any]]]:
+    """
+    Converts a BREFF file to JSON.
+
+    :param data: The BREFF file data.
+    :param names: The names or glob patterns of the effects to convert, defaults to None (all effects).
+    :param options: The options to use, named after the command line options (such as numpy or columnar).
+    :return: A tuple of the file metadata and the JSON data of each effect, by name and in table order.
+    """
+    with override_args(**options):
+        index = EffectIndex(data)
+        effects = {entry.name.name: index.decode(entry).to_json() for entry in index.select(names)}
+        return index.header.to_json(), effects
+
+
+def encode(meta: dict[str, Any], effects: dict[str, dict[str, Any] | bytes], **options: Any) -> bytes:
+    """
+    Converts a BREFF file from JSON.
+
+    :param meta: The file metadata, as found in the meta file of decoded directories.
+    :param effects: The JSON data of each effect by name. Encoded effect data is inserted as-is.
+    :param options: The options to use, named after the command line options (such as numpy or columnar).
+    :return: The BREFF file data, with the effects sorted by name like when encoding a directory.
+    """
+    with override_args(**options):
+        header = BinaryFileHeader.from_json(meta)
+        names = sorted(effects, key=lambda name: f'{name}.json')
+        encoded = [(name, effects[name] if isinstance(effects[name], bytes) else encode_effect(effects[name]))
+                   for name in names]
+        return pack_effects(header, encoded)
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+
+# breff_client.py
+# Forwards a command line to a running conversion server, to skip the converter's startup time
+
+import os
+import socket
+import sys
+from common.common import get_server_address, get_socket_address, json_dump_line, json_load_line
+
+if __name__ == '__main__':
+
+    # Connect to the server
+    address = get_server_address()
+    family, socket_address = get_socket_address(address)
+    try:
+        client = socket.socket(family, socket.SOCK_STREAM)
+        client.connect(socket_address)
+    except OSError as e:
+        raise SystemExit(f'Could not connect to the server at {address} ({e}).')
+
+    # Send the arguments along with the working directory to resolve relative paths, then wait for the result
+    with client, client.makefile('rwb') as stream:
+        stream.write(json_dump_line({'cwd': os.getcwd(), 'argv': sys.argv[1:]}))
+        stream.flush()
+        response = stream.readline()
+
+    # Print the output and return the same status as the server
+    if not response:
+        raise SystemExit('The server closed the connection.')
+    response = json_load_line(response)
+    print(response['output'], end='')
+    raise SystemExit(response['status'])
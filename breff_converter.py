@@ -3,17 +3,67 @@
 # breff_converter.py
 # Converts a BREFF file to a series of JSON files and back
 
+import hashlib
+import io
+import multiprocessing
+import os
+import socket
 import sys
+import tempfile
+import threading
+import time
+import traceback
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import redirect_stderr, redirect_stdout
+from functools import cache
 from pathlib import Path
-from common.args import args
-from common.common import META_FILE, json_dump, json_load, printv
-from common.nw4r import NameString
-from effect.effect import BinaryFileHeader, EffectTable, EffectTableEntry, Effect
+from typing import Any, Callable, Optional
+from breff import add_effect, pack_effects
+from common.args import args, parse_args, set_args
+from common.common import BUNDLE_SUFFIX, CACHE_DIR, META_FILE, SERVER_TIMEOUT, VERSION, WATCH_DEBOUNCE, WATCH_INTERVAL, \
+                          get_server_address, get_socket_address, json_dump, json_load, json_dump_line, json_load_line, \
+                          map_file, printv
+from common.field import Buffer, disable_tracing, enable_tracing
+from effect.effect import BinaryFileHeader, Effect
+from effect.index import EffectIndex
 
 if sys.version_info < (3, 11):
     raise SystemExit('Please update your copy of Python to 3.11 or greater. Currently running on: ' + sys.version.split()[0])
 
-def decode(src: Path, dst: Path) -> None:
+# Server state
+serving = False
+server_cwd = ''
+worker_output: Optional[multiprocessing.Queue] = None
+
+def run_jobs(executor: Optional[Executor], function: Callable[..., Any], jobs: list[tuple],
+             key: Optional[Callable[..., int]] = None) -> list:
+
+    # Run the jobs in order if running on a single process
+    if executor is None:
+        return [function(*job) for job in jobs]
+
+    # Else hand them to the workers, starting from the largest ones (by key) to keep the workers busy until the end
+    # The results are still returned in the order of the jobs
+    schedule = sorted(range(len(jobs)), key=lambda i: key(*jobs[i]), reverse=True) if key else range(len(jobs))
+    futures = {i: executor.submit(function, *jobs[i]) for i in schedule}
+    return [futures[i].result() for i in range(len(jobs))]
+
+
+def decode_effect(name: str, data: Buffer, dst: Optional[Path]) -> Optional[bytes]:
+    printv(f'Parsing effect {name}...')
+    effect, _ = Effect.from_bytes(data)
+
+    # Return the effect as a bundle line if there is no destination directory
+    if dst is None:
+        return json_dump_line({'name': name, 'effect': effect.to_json()})
+
+    # Else write it to its own file
+    effect_file = Path(dst, f'{name}.json')
+    if not json_dump(effect_file, effect.to_json(), args.incremental):
+        printv(f'Effect {name} did not change')
+
+
+def decode(src: Path, dst: Path, executor: Optional[Executor] = None) -> None:
 
     # Ensure file format matches
     # TODO remove this and check the magic instead
@@ -25,32 +75,137 @@ def decode(src: Path, dst: Path) -> None:
         raise SystemExit(f'Could not find file {src}.')
 
     # Ensure the destination does not exist if overwrite is not specified
-    if dst.is_dir() and not args.overwrite:
+    # Incremental decodes are meant to update existing directories, so they are exempt
+    if args.bundle and dst.is_file() and not args.overwrite:
+        raise SystemExit(f'Destination file {dst} already exists.')
+    elif not args.bundle and dst.is_dir() and not args.overwrite and not args.incremental:
         raise SystemExit(f'Destination directory {dst} already exists.')
 
-    # Create the destination directory
-    dst.mkdir(parents=True, exist_ok=True)
-
-    # Open file and decode it
+    # Map the file while decoding it
     printv(f'Parsing file {src}...')
-    src_data = src.read_bytes()
-    header, _ = BinaryFileHeader.from_bytes(src_data)
+    with map_file(src) as data:
+        decode_index(EffectIndex(data), dst, executor)
+
+
+def decode_index(index: EffectIndex, dst: Path, executor: Optional[Executor] = None) -> None:
+
+    # Get the selected effects
+    header = index.header
+    effects = [(entry.name.name, entry.data) for entry in index.select(args.names)]
+
+    # Write a bundle if requested
+    if args.bundle:
+        decode_bundle(dst, header, effects, executor)
+        return
+
+    # Else create the destination directory
+    dst.mkdir(parents=True, exist_ok=True)
 
     # Write the meta file
     meta_file = Path(dst, META_FILE)
-    json_dump(meta_file, header.to_json())
+    json_dump(meta_file, header.to_json(), args.incremental)
+
+    # Remove the effects that are no longer in the file if updating the directory
+    # Skip this when extracting, as the other effects are simply not selected
+    if args.incremental and not args.names:
+        effect_files = {f'{name}.json' for name, _ in effects}
+        for file in dst.glob('*.json'):
+            if file != meta_file and file.name not in effect_files:
+                printv(f'Removing {file}...')
+                file.unlink()
+
+    # Decode the effects, copying their data if it must be sent to the workers
+    jobs = [(name, data if executor is None else bytes(data), dst) for name, data in effects]
+    run_jobs(executor, decode_effect, jobs, lambda name, data, dst: len(data))
+
+
+def decode_bundle(dst: Path, header: BinaryFileHeader, effects: list[tuple[str, Buffer]],
+                  executor: Optional[Executor] = None) -> None:
+    with dst.open('wb') as bundle:
+
+        # Write the metadata on the first line
+        bundle.write(json_dump_line(header.to_json()))
+
+        # Decode the effects, copying their data if it must be sent to the workers, and write each one on its own line
+        jobs = [(name, data if executor is None else bytes(data), None) for name, data in effects]
+        for line in run_jobs(executor, decode_effect, jobs, lambda name, data, dst: len(data)):
+            bundle.write(line)
+
 
-    # Create the effect table from the project data, then iterate it
-    effect_table, _ = EffectTable.from_bytes(header.block.project.project_data)
-    for entry in effect_table.entries:
+def encode_effect(file: Path) -> bytes:
+    printv(f'Parsing {file}...')
+    effect_data = json_load(file)
+    return Effect.from_json(effect_data).to_bytes()
 
-        printv(f'Parsing effect {entry.name.name}...')
-        effect, _ = Effect.from_bytes(entry.data)
-        effect_file = Path(dst, f'{entry.name.name}.json')
-        json_dump(effect_file, effect.to_json())
 
+@cache
+def get_source_hash() -> bytes:
 
-def encode(src: Path, dst: Path) -> None:
+    # Hash the sources of the codecs, so that any change to them invalidates the cached effects
+    source_hash = hashlib.sha256()
+    root = Path(__file__).parent
+    files = [Path(root, 'breff.py')]
+    for package in ('animations', 'common', 'effect', 'emitter', 'particle'):
+        files.extend(sorted(Path(root, package).rglob('*.py')))
+    for file in files:
+        source_hash.update(file.relative_to(root).as_posix().encode())
+        source_hash.update(file.read_bytes())
+    return source_hash.digest()
+
+
+def get_cache_key(data: bytes) -> str:
+
+    # Include the converter version and sources, since the encoded data may change across versions
+    return hashlib.sha256(VERSION.encode() + get_source_hash() + data).hexdigest()
+
+
+def load_cached_effects(cache_dir: Path, files: list[Path]) -> tuple[dict[Path, str], dict[Path, bytes]]:
+
+    # Get the cache key of each file and the encoded effects for the ones that did not change
+    keys: dict[Path, str] = {}
+    effects: dict[Path, bytes] = {}
+    for file in files:
+        keys[file] = get_cache_key(file.read_bytes())
+        cache_file = Path(cache_dir, f'{keys[file]}.bin')
+        if cache_file.is_file():
+            printv(f'Using cached {file}...')
+            effects[file] = cache_file.read_bytes()
+    return keys, effects
+
+
+def update_effect_cache(cache_dir: Path, keys: dict[Path, str], effects: dict[Path, bytes]) -> None:
+
+    # Store the newly encoded effects
+    cache_dir.mkdir(exist_ok=True)
+    for file, key in keys.items():
+        cache_file = Path(cache_dir, f'{key}.bin')
+        if cache_file.is_file():
+            continue
+
+        # Write each entry to a temporary file first, so interrupted or concurrent encodes cannot leave it incomplete
+        fd, temp_path = tempfile.mkstemp('.tmp', key, cache_dir)
+        try:
+            with os.fdopen(fd, 'wb') as temp_file:
+                temp_file.write(effects[file])
+            os.replace(temp_path, cache_file)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    # Remove the entries that are no longer in use
+    used_files = {f'{key}.bin' for key in keys.values()}
+    for cache_file in cache_dir.glob('*.bin'):
+        if cache_file.name not in used_files:
+            cache_file.unlink()
+
+
+def encode_bundle_effect(line: bytes) -> tuple[str, bytes]:
+    data = json_load_line(line)
+    printv(f'Parsing effect {data["name"]}...')
+    return data['name'], Effect.from_json(data['effect']).to_bytes()
+
+
+def encode_directory(src: Path, executor: Optional[Executor] = None) -> tuple[BinaryFileHeader, list[tuple[str, bytes]]]:
 
     # Ensure directory exists
     if not src.is_dir():
@@ -61,57 +216,541 @@ def encode(src: Path, dst: Path) -> None:
     if not meta_file.is_file():
         raise SystemExit(f'Missing metadata file in directory {src}.')
 
-    # Ensure the destination does not exist if overwrite is not specified
-    if dst.is_file() and not args.overwrite:
-        raise SystemExit(f'Destination file {dst} already exists.')
-
     # Read the meta file
     printv(f'Parsing directory {src}...')
     meta_data = json_load(meta_file)
     header = BinaryFileHeader.from_json(meta_data)
 
-    # Create the effect table
-    effect_table = EffectTable()
+    # Get each effect file (ensure the files are sorted and skip the meta file)
+    files = [file for file in sorted(src.glob('*.json')) if file != meta_file]
+
+    # Reuse the effects that did not change since the last encode if caching is enabled
+    cache_dir = Path(src, CACHE_DIR)
+    keys, effects = load_cached_effects(cache_dir, files) if args.cache else ({}, {})
+    pending = [file for file in files if file not in effects]
+
+    # Encode the other effects
+    jobs = [(file,) for file in pending]
+    effects.update(zip(pending, run_jobs(executor, encode_effect, jobs, lambda file: file.stat().st_size)))
+
+    # Update the cache
+    if args.cache:
+        update_effect_cache(cache_dir, keys, effects)
+
+    # Return the header and the effects in order
+    return header, [(file.stem, effects[file]) for file in files]
+
+
+def encode_bundle(src: Path, executor: Optional[Executor] = None) -> tuple[BinaryFileHeader, list[tuple[str, bytes]]]:
+
+    # Ensure file exists
+    if not src.is_file():
+        raise SystemExit(f'Could not find file {src}.')
+
+    # Read the bundle one line at a time
+    printv(f'Parsing bundle {src}...')
+    with src.open('rb') as bundle:
+
+        # Read the metadata from the first line
+        header = BinaryFileHeader.from_json(json_load_line(bundle.readline()))
+
+        # Read the effects, one per line
+        lines = [(line,) for line in bundle if line.strip()]
+
+    # Encode the effects
+    effects = run_jobs(executor, encode_bundle_effect, lines, len)
+
+    # Sort the effects like the files of a directory would be, to get the same output
+    effects.sort(key=lambda effect: f'{effect[0]}.json')
+    return header, effects
+
+
+def encode(src: Path, dst: Path, executor: Optional[Executor] = None) -> None:
+
+    # Ensure the destination does not exist if overwrite is not specified
+    if dst.is_file() and not args.overwrite:
+        raise SystemExit(f'Destination file {dst} already exists.')
+
+    # Encode the effects
+    if src.suffix == BUNDLE_SUFFIX:
+        header, effects = encode_bundle(src, executor)
+    else:
+        header, effects = encode_directory(src, executor)
+
+    # Build the file and write it out
+    dst.write_bytes(pack_effects(header, effects))
+
+
+def patch(src: Path, dst: Path, executor: Optional[Executor] = None) -> None:
+
+    # Ensure file exists
+    if not src.is_file():
+        raise SystemExit(f'Could not find file {src}.')
+
+    # Ensure the destination does not exist if overwrite is not specified
+    if dst.is_file() and not args.overwrite:
+        raise SystemExit(f'Destination file {dst} already exists.')
+
+    # Ensure every effect to patch in exists
+    for file in args.effects:
+        if not file.is_file():
+            raise SystemExit(f'Could not find effect file {file}.')
+
+    # Read the effect table
+    # The file is not mapped, since the destination can be the file itself
+    printv(f'Parsing file {src}...')
+    index = EffectIndex(src.read_bytes())
+
+    # Encode the JSON effects, and use the other files as they are
+    json_files = [file for file in args.effects if file.suffix == '.json']
+    jobs = [(file,) for file in json_files]
+    encoded = dict(zip(json_files, run_jobs(executor, encode_effect, jobs, lambda file: file.stat().st_size)))
+    effects = {file.stem: encoded[file] if file in encoded else file.read_bytes() for file in args.effects}
+
+    # Replace the data of the existing effects, leaving the others untouched
+    for entry in index.entries:
+        if (name := entry.name.name) in effects:
+            printv(f'Replacing effect {name}...')
+            entry.data = effects.pop(name)
+
+    # Add the remaining effects at the end of the table
+    for name, effect in effects.items():
+        printv(f'Adding effect {name}...')
+        add_effect(index.table, name, effect)
+
+    # Rebuild the effect table to update the offsets, then write the file out with the updated sizes
+    index.header.block.project.project_data = index.table.to_bytes()
+    dst.write_bytes(index.header.to_bytes())
+
+
+def convert_effect(data: Buffer) -> bytes:
+
+    # Go through the JSON representation, like a decode followed by an encode would
+    effect, _ = Effect.from_bytes(data)
+    return Effect.from_json(effect.to_json()).to_bytes()
+
+
+def merge(sources: list[Path], dst: Path, executor: Optional[Executor] = None) -> None:
+
+    # Ensure files exist
+    for src in sources:
+        if not src.is_file():
+            raise SystemExit(f'Could not find file {src}.')
+
+    # Ensure the destination does not exist if overwrite is not specified
+    if dst.is_file() and not args.overwrite:
+        raise SystemExit(f'Destination file {dst} already exists.')
+
+    # Read the effect tables, using the first file's header for the output
+    # The files are not mapped, since the destination can be one of them
+    indexes = [EffectIndex(src.read_bytes()) for src in sources]
+    header = indexes[0].header
+
+    # Collect the effects of every file, and the ones that must be converted
+    effects: dict[str, Buffer] = {}
+    conversions: dict[str, Buffer] = {}
+    for src, index in zip(sources, indexes):
+        printv(f'Merging file {src}...')
+        for entry in index.entries:
 
-    # Parse each effect file (ensure the files are sorted)
-    for file in sorted(src.glob('*.json')):
+            # Handle name conflicts according to the chosen policy (replaced effects keep their position)
+            name = entry.name.name
+            if name in effects:
+                if args.conflicts == 'error':
+                    raise SystemExit(f'Effect {name} in {src} already exists in a previous file.')
+                elif args.conflicts == 'first':
+                    continue
 
-        # Skip the meta file
-        if file == meta_file:
+            # Copy the effect as-is if the versions match, else convert it later
+            effects[name] = entry.data
+            if index.header.version == header.version:
+                conversions.pop(name, None)
+            else:
+                conversions[name] = entry.data
+
+    # Convert the effects, copying their data if it must be sent to the workers
+    jobs = [(data if executor is None else bytes(data),) for data in conversions.values()]
+    effects.update(zip(conversions, run_jobs(executor, convert_effect, jobs, len)))
+
+    # Build the file and write it out
+    dst.write_bytes(pack_effects(header, list(effects.items())))
+
+
+def list_effects(src: Path) -> None:
+
+    # Ensure file exists
+    if not src.is_file():
+        raise SystemExit(f'Could not find file {src}.')
+
+    # Map the file while reading its effect table
+    with map_file(src) as data:
+        print_effects(src, EffectIndex(data))
+
+
+def print_effects(src: Path, index: EffectIndex) -> None:
+
+    # Get the selected effects
+    entries = index.select(args.names)
+    print(f'{src}: version {index.header.version}, {len(entries)}/{len(index.entries)} effects')
+
+    # Print the name, offset and size of each effect
+    width = max((len(entry.name.name) for entry in entries), default=0)
+    for entry in entries:
+        print(f'  {entry.name.name:<{width}}  offset {index.get_offset(entry):#010x}  size {entry.data_size:#x}')
+
+
+def get_input_size(src: Path) -> int:
+
+    # Directories are measured by the size of their JSON files
+    if src.is_dir():
+        return sum(file.stat().st_size for file in src.glob('*.json'))
+    elif src.is_file():
+        return src.stat().st_size
+    return 0
+
+
+def report_failure(src: Path, e: BaseException) -> None:
+
+    # Print the traceback of unexpected errors, since the input data is not validated and it shows where decoding failed
+    if not isinstance(e, SystemExit):
+        traceback.print_exception(e, file=sys.stderr)
+    print(f'{src}: FAILED ({e if isinstance(e, SystemExit) else f"{type(e).__name__}: {e}"})')
+
+
+def scan_directory(src: Path) -> dict[Path, tuple[int, int]]:
+
+    # Get the modification time and size of each JSON file, to detect the changed ones
+    state = {}
+    for file in src.glob('*.json'):
+        try:
+            stat = file.stat()
+            state[file] = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
             continue
+    return state
 
-        # Create the effect and encode it
-        printv(f'Parsing {file}...')
-        effect_data = json_load(file)
-        effect = Effect.from_json(effect_data).to_bytes()
 
-        # Create the table entry
-        effect_table_entry = EffectTableEntry(effect_table)
-        effect_table_entry.data = effect
-        effect_table_entry.name = NameString(effect_table_entry)
-        effect_table_entry.name.name = file.stem
-        effect_table.entries.append(effect_table_entry)
+def rebuild(src: Path, dst: Path, effects: dict[Path, bytes], changed: list[Path],
+            executor: Optional[Executor] = None) -> None:
 
-    # Encode the effect table and insert it into the project
-    header.block.project.project_data = effect_table.to_bytes()
+    # Read the meta file again, as it might have changed as well
+    meta_file = Path(src, META_FILE)
+    header = BinaryFileHeader.from_json(json_load(meta_file))
 
-    # Write the file out
-    dst.write_bytes(header.to_bytes())
+    # Encode the changed effects
+    pending = [file for file in changed if file != meta_file]
+    jobs = [(file,) for file in pending]
+    effects.update(zip(pending, run_jobs(executor, encode_effect, jobs, lambda file: file.stat().st_size)))
 
+    # Build the file with the effects sorted like in a regular encode, and write it out
+    dst.write_bytes(pack_effects(header, [(file.stem, effects[file]) for file in sorted(effects)]))
 
-if __name__ == '__main__':
+
+def watch(jobs: list[tuple[Path, Path]], executor: Optional[Executor] = None) -> None:
+
+    # Ensure every input is a directory and the destinations do not exist if overwrite is not specified
+    for src, dst in jobs:
+        if not src.is_dir():
+            raise SystemExit(f'Could not find directory {src}.')
+        elif dst.is_file() and not args.overwrite:
+            raise SystemExit(f'Destination file {dst} already exists.')
+
+    # Do a regular encode first, and keep the encoded effects for the following rebuilds
+    states: dict[Path, dict[Path, tuple[int, int]]] = {}
+    effects: dict[Path, dict[Path, bytes]] = {}
+    for src, dst in jobs:
+        states[src] = scan_directory(src)
+        header, encoded = encode_directory(src, executor)
+        effects[src] = {Path(src, f'{name}.json'): effect for name, effect in encoded}
+        dst.write_bytes(pack_effects(header, encoded))
+        print(f'{src}: watching for changes to update {dst}...')
+
+    # Check the directories periodically until interrupted
+    pending: dict[Path, set[Path]] = {src: set() for src, _ in jobs}
+    last_changes: dict[Path, float] = {}
+    try:
+        while True:
+            time.sleep(WATCH_INTERVAL)
+            for src, dst in jobs:
+
+                # Collect the changed files, and forget the removed ones
+                state = scan_directory(src)
+                if state != states[src]:
+                    pending[src].update(file for file, stamp in state.items() if states[src].get(file) != stamp)
+                    for file in states[src].keys() - state.keys():
+                        effects[src].pop(file, None)
+                        pending[src].discard(file)
+                    states[src] = state
+                    last_changes[src] = time.time()
+                    continue
+
+                # Wait for the changes to stop before rebuilding, since saving files can take multiple writes
+                if src not in last_changes or time.time() - last_changes[src] < WATCH_DEBOUNCE:
+                    continue
+
+                # Rebuild the file, reporting any failure without stopping
+                # The changed files are kept pending on failure, so they are encoded again with the next change
+                changed = sorted(pending[src])
+                last_change = last_changes.pop(src)
+                start = time.perf_counter()
+                try:
+                    rebuild(src, dst, effects[src], changed, executor)
+                except (Exception, SystemExit) as e:
+                    report_failure(src, e)
+                    continue
+                pending[src].clear()
+
+                # Report the time taken since the last file was saved (or removed)
+                saved = max((state[file][0] / 1e9 for file in changed), default=last_change)
+                print(f'{src}: updated {dst} ({len(changed)} changed files in {time.perf_counter() - start:.2f}s, '
+                      f'{time.time() - saved:.2f}s after the last change)')
+
+    except KeyboardInterrupt:
+        print('Stopped watching.')
+
+
+def convert(operation: Callable, src: Path, dst: Path, executor: Optional[Executor] = None) -> bool:
+
+    # Run the operation, reporting any failure without stopping the other files
+    start = time.perf_counter()
+    try:
+        operation(src, dst, executor)
+    except (Exception, SystemExit) as e:
+        report_failure(src, e)
+        return False
+
+    # Report the throughput
+    elapsed = time.perf_counter() - start
+    size = get_input_size(src)
+    print(f'{src}: OK ({size / 1024:.1f} KiB in {elapsed:.2f}s, {size / 1024 / max(elapsed, 1e-6):.1f} KiB/s)')
+    return True
+
+
+class QueueWriter(io.TextIOBase):
+    def __init__(self, queue: multiprocessing.Queue) -> None:
+        self.queue = queue
+
+    def write(self, text: str) -> int:
+        self.queue.put(text)
+        return len(text)
+
+
+def init_worker(options: dict, output: Optional[multiprocessing.Queue]) -> None:
+
+    # Use the same options in the worker processes, as they are not parsed again when the workers are spawned
+    set_args(**options)
+
+    # Send the output back to the server if running a request, since it would otherwise be lost
+    if output is not None:
+        sys.stdout = sys.stderr = QueueWriter(output)
+
+    # Instrument the field codecs in the worker processes as well
+    if args.verbose:
+        enable_tracing()
+
+
+@cache
+def get_process_context() -> multiprocessing.context.BaseContext:
+
+    # Start the workers from a fork server where available, as forking while other threads run can deadlock them
+    # The fork server loads the converter once, so that each worker does not have to import it again
+    if 'forkserver' not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context()
+    context = multiprocessing.get_context('forkserver')
+    context.set_forkserver_preload(['__main__'])
+    return context
+
+
+def create_pool() -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(args.jobs, mp_context=get_process_context(), initializer=init_worker,
+                               initargs=(vars(args), worker_output))
+
+
+def copy_output(queue: multiprocessing.Queue, output: io.StringIO) -> None:
+    while (text := queue.get()) is not None:
+        output.write(text)
+
+
+def validate_request(request: Any) -> None:
+
+    # Ensure the request contains a working directory and a command line
+    if not isinstance(request, dict):
+        raise ValueError('The request is not an object')
+    elif not isinstance(request.get('cwd'), str):
+        raise ValueError('The request has no valid working directory')
+    elif not isinstance(request.get('argv'), list) or not all(isinstance(arg, str) for arg in request['argv']):
+        raise ValueError('The request has no valid arguments')
+
+
+def run_request(request: dict) -> dict:
+    global worker_output
+
+    # Collect the output of the worker processes as well
+    output = io.StringIO()
+    worker_output = get_process_context().Queue()
+    reader = threading.Thread(target=copy_output, args=(worker_output, output))
+    reader.start()
+
+    # Run the command line sent by the client from its working directory, capturing the output
+    status = 0
+    try:
+        os.chdir(request['cwd'])
+        with redirect_stdout(output), redirect_stderr(output):
+            main(request['argv'])
+    except SystemExit as e:
+        if isinstance(e.code, str):
+            output.write(f'{e.code}\n')
+            status = 1
+        else:
+            status = e.code or 0
+    except Exception:
+        output.write(traceback.format_exc())
+        status = 1
+
+    # Undo the changes made by the request, after the worker output is collected (the workers are done by now)
+    finally:
+        worker_output.put(None)
+        reader.join()
+        worker_output.close()
+        worker_output = None
+        os.chdir(server_cwd)
+        disable_tracing()
+
+    return {'output': output.getvalue(), 'status': status}
+
+
+def handle_request(line: bytes) -> dict:
+
+    # Reject malformed and invalid requests, sending the reason back to the client
+    start = time.perf_counter()
+    try:
+        request = json_load_line(line)
+        validate_request(request)
+    except ValueError as e:
+        print(f'Invalid request ({type(e).__name__}: {e})')
+        return {'output': f'Invalid request ({e}).\n', 'status': 1}
+
+    # Else run the request
+    response = run_request(request)
+    print(f'{" ".join(request["argv"])}: status {response["status"]} in {time.perf_counter() - start:.2f}s')
+    return response
+
+
+def serve(address: str) -> None:
+    global serving, server_cwd
+
+    # Remove the stale socket file left by a previous server, unless that server is still running
+    family, socket_address = get_socket_address(address)
+    if family == socket.AF_UNIX and Path(socket_address).is_socket():
+        with socket.socket(family, socket.SOCK_STREAM) as probe:
+            try:
+                probe.connect(socket_address)
+            except OSError:
+                Path(socket_address).unlink()
+            else:
+                raise SystemExit(f'A server is already running at {address}.')
+
+    # Handle the requests one at a time, as the options and the working directory are shared
+    # The modules stay loaded across requests, and worker processes are started from a fork server that loaded them once
+    serving, server_cwd = True, os.getcwd()
+    with socket.socket(family, socket.SOCK_STREAM) as server:
+
+        # Create Unix sockets with owner-only permissions, as clients can run any command as the server's user
+        if family == socket.AF_UNIX:
+            umask = os.umask(0o177)
+            try:
+                server.bind(socket_address)
+            finally:
+                os.umask(umask)
+            os.chmod(socket_address, 0o600)
+        else:
+            server.bind(socket_address)
+
+        server.listen()
+        print(f'Listening on {address}...')
+        while True:
+            connection, _ = server.accept()
+
+            # Report disconnected and unresponsive clients without stopping the server
+            try:
+                connection.settimeout(SERVER_TIMEOUT)
+                with connection, connection.makefile('rwb') as stream:
+                    if line := stream.readline():
+                        stream.write(json_dump_line(handle_request(line)))
+                        stream.flush()
+            except OSError as e:
+                print(f'Request failed ({type(e).__name__}: {e})')
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+
+    # Parse the arguments
+    parse_args(argv)
 
     # Define valid operations
     operations = {
         'decode': decode,
         'encode': encode,
+        'extract': decode,
+        'patch': patch,
     }
 
-    # Get inputs and outputs
+    # Start the server if requested, which then runs the command lines sent by the clients
     args.sources = args.sources[0]
+    if args.operation == 'serve':
+        if serving:
+            raise SystemExit('The server is already running.')
+        serve(args.address or get_server_address())
+        raise SystemExit()
+
+    # Watching directories would block the server indefinitely
+    if args.operation == 'watch' and serving:
+        raise SystemExit('Watching directories is not supported by the server.')
+
+    # Ensure inputs were given
+    if not args.sources:
+        raise SystemExit('No inputs were specified.')
+
+    # List the effects of each file if requested, without converting anything
+    if args.operation == 'list':
+        for src in args.sources:
+            list_effects(src)
+        raise SystemExit()
+
+    # Ensure the amount of jobs is valid
+    if args.jobs < 1:
+        raise SystemExit('The number of jobs must be at least 1.')
+
+    # Instrument the field codecs if verbose output is requested
+    if args.verbose:
+        enable_tracing()
+
+    # Merge the files if requested, which produces a single output
+    if args.operation == 'merge':
+        if args.dests is None or len(args.dests) != 1:
+            raise SystemExit('Merging requires a single output path.')
+        elif args.jobs == 1:
+            merge(args.sources, args.dests[0])
+        else:
+            with create_pool() as executor:
+                merge(args.sources, args.dests[0], executor)
+        raise SystemExit()
+
+    # Ensure effects to extract were selected
+    if args.operation == 'extract' and not args.names:
+        raise SystemExit('No effects to extract were specified.')
+
+    # Ensure effects to patch in were given
+    if args.operation == 'patch' and not args.effects:
+        raise SystemExit('No effects to patch were specified.')
+
+    # Get inputs and outputs (patched files replace the original ones by default)
     if args.dests is None:
-        if args.operation == 'decode':
-            args.dests = [file.with_suffix('.breff.d') for file in args.sources]
+        if args.operation == 'patch':
+            args.dests = list(args.sources)
+        elif args.operation not in ('encode', 'watch'):
+            suffix = f'.breff{BUNDLE_SUFFIX}' if args.bundle else '.breff.d'
+            args.dests = [file.with_suffix(suffix) for file in args.sources]
         else:
             args.dests = [file.with_suffix('').with_suffix('.breff') for file in args.sources]
 
@@ -119,6 +758,41 @@ if __name__ == '__main__':
     if len(args.dests) != len(args.sources):
         raise SystemExit('Wrong number of output paths.')
 
-    # Execute function
-    for src, dest in zip(args.sources, args.dests):
-        operations[args.operation](src, dest)
+    # Watch the directories if requested, sharing a single pool of workers
+    if args.operation == 'watch':
+        if args.jobs == 1:
+            watch(list(zip(args.sources, args.dests)))
+        else:
+            with create_pool() as executor:
+                watch(list(zip(args.sources, args.dests)), executor)
+        raise SystemExit()
+
+    # Schedule the largest inputs first
+    operation = operations[args.operation]
+    jobs = sorted(zip(args.sources, args.dests), key=lambda job: get_input_size(job[0]), reverse=True)
+    start = time.perf_counter()
+
+    # Convert the files in order if running on a single process
+    if args.jobs == 1:
+        results = [convert(operation, src, dest) for src, dest in jobs]
+
+    # Else convert up to one file per job at a time, sharing a single pool of workers for the effects
+    else:
+        with create_pool() as executor:
+            with ThreadPoolExecutor(args.jobs) as scheduler:
+                results = list(scheduler.map(lambda job: convert(operation, *job, executor), jobs))
+
+    # Report the total throughput
+    if len(jobs) > 1:
+        elapsed = time.perf_counter() - start
+        size = sum(get_input_size(src) for src, _ in jobs)
+        print(f'Converted {results.count(True)}/{len(jobs)} files ({size / 1024:.1f} KiB in {elapsed:.2f}s, '
+              f'{size / 1024 / max(elapsed, 1e-6):.1f} KiB/s)')
+
+    # Return an error if any file failed
+    if not all(results):
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
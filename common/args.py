@@ -4,15 +4,60 @@
 # Args management
 
 import argparse
+from contextlib import contextmanager
 from pathlib import Path
+from threading import RLock
+from typing import Optional
 
-def get_args():
+def get_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description='Converts a BREFF file to a set of JSON files and back')
-    parser.add_argument('operation', choices=['decode', 'encode'], help='The operation to execute')
-    parser.add_argument('sources', nargs='+', type=Path, help='The files/directories to convert', action='append')
+    parser.add_argument('operation', choices=['decode', 'encode', 'list', 'extract', 'patch', 'merge', 'serve', 'watch'], help='The operation to execute')
+    parser.add_argument('sources', nargs='*', type=Path, help='The files/directories to convert', action='append')
     parser.add_argument('-d', '--dests', nargs='*', type=Path, help='The output directory/file for each input')
+    parser.add_argument('-e', '--effects', nargs='+', type=Path, help='The effect JSON files or binaries to patch in')
+    parser.add_argument('-n', '--names', nargs='+', help='The names or glob patterns of the effects to list/extract')
+    parser.add_argument('--conflicts', choices=['error', 'first', 'last'], default='error',
+                        help='How to handle effects with the same name when merging')
     parser.add_argument('-o', '--overwrite', action='store_true', help='Overwrite existing files')
+    parser.add_argument('-b', '--bundle', action='store_true', help='Decode to a single NDJSON bundle instead of a directory')
+    parser.add_argument('-i', '--incremental', action='store_true', help='Only write decoded files that changed')
+    parser.add_argument('-c', '--cache', action='store_true', help='Cache encoded effects to only encode the changed ones')
+    parser.add_argument('--numpy', action='store_true', help='Store baked animation frames as NumPy arrays, if available')
+    parser.add_argument('--columnar', action='store_true', help='Store baked animation frames as a list of values for each target in JSON')
+    parser.add_argument('--address', help='The address the server listens on, either a Unix socket path or host:port')
+    parser.add_argument('-j', '--jobs', type=int, default=1, help='The number of processes used to convert effects')
     parser.add_argument('-v', '--verbose', action='store_true', help='Enable verbose output (for debugging)')
-    return parser.parse_args()
+    return parser
 
-args = get_args()
+
+# Default options, used when the converter is imported as a library
+# The other modules hold a reference to this object, so it must always be updated in place
+args = argparse.Namespace(**{action.dest: action.default for action in get_parser()._actions
+                             if action.default != argparse.SUPPRESS})
+
+# Lock held while the options are temporarily changed, as they are shared by every thread
+args_lock = RLock()
+
+# Parses the command line arguments into the options
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    set_args(**vars(get_parser().parse_args(argv)))
+    return args
+
+# Updates the options
+def set_args(**options) -> None:
+    for name in options:
+        if not hasattr(args, name):
+            raise TypeError(f'Unknown option {name}')
+    vars(args).update(options)
+
+# Temporarily updates the options, restoring the previous ones afterwards
+# Other threads using this wait until it is done, so that they cannot see each other's options
+@contextmanager
+def override_args(**options):
+    with args_lock:
+        previous = {name: getattr(args, name) for name in options if hasattr(args, name)}
+        set_args(**options)
+        try:
+            yield args
+        finally:
+            set_args(**previous)
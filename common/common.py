@@ -3,33 +3,67 @@
 # common.py
 # Common utilities
 
+import gc
+import mmap
+import os
 import re
+import socket
+from contextlib import contextmanager, suppress
 from enum import IntEnum
 from pathlib import Path
+from typing import Iterator
 from common.args import args
 
+VERSION = '1.0' # Bump whenever the encoded output changes, as it is part of the effect cache key
 META_FILE = 'meta.json'
-
+CACHE_DIR = '.cache'
+BUNDLE_SUFFIX = '.ndjson'
+SERVER_ADDRESS = str(Path.home() / '.breff_server.sock') # Only accessible by the current user
+SERVER_ADDRESS_VAR = 'BREFF_SERVER'
+SERVER_TIMEOUT = 10 # Seconds to wait for a client, so that an unresponsive one cannot block the server
+WATCH_INTERVAL = 0.05
+WATCH_DEBOUNCE = 0.1
+
+# The dump functions return whether the file was written, as unchanged files can be skipped
 try:
     import orjson
 
-    def json_dump(path: Path, data: dict) -> None:
-        path.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+    def json_dump(path: Path, data: dict, only_changed: bool = False) -> bool:
+        data = orjson.dumps(data, option=orjson.OPT_INDENT_2)
+        if only_changed and path.is_file() and path.read_bytes() == data:
+            return False
+        path.write_bytes(data)
+        return True
 
     def json_load(path: Path) -> dict:
         return orjson.loads(path.read_bytes())
 
+    def json_dump_line(data: dict) -> bytes:
+        return orjson.dumps(data) + b'\n'
+
+    def json_load_line(line: bytes) -> dict:
+        return orjson.loads(line)
+
 except ImportError:
     import json
 
-    def json_dump(path: Path, data: dict) -> None:
+    def json_dump(path: Path, data: dict, only_changed: bool = False) -> bool:
         data = json.dumps(data, separators=(',', ': '), indent=2)
+        if only_changed and path.is_file() and path.read_text(encoding='utf-8') == data:
+            return False
         path.write_text(data, encoding='utf-8')
+        return True
 
     def json_load(path: Path) -> dict:
         data = path.read_text(encoding='utf-8')
         return json.loads(data)
 
+    def json_dump_line(data: dict) -> bytes:
+        return json.dumps(data, separators=(',', ':')).encode('utf-8') + b'\n'
+
+    def json_load_line(line: bytes) -> dict:
+        return json.loads(line)
+
 
 # Debug print helper
 def printv(*arguments, **kwargs):
@@ -38,6 +72,46 @@ def printv(*arguments, **kwargs):
         print(*arguments, **kwargs)
 
 
+# Maps a file to memory for reading, so that it is only loaded as it is accessed and never copied
+# The map is closed on exit, so the views into it must not be used afterwards
+@contextmanager
+def map_file(path: Path) -> Iterator[memoryview]:
+    with path.open('rb') as file:
+        if path.stat().st_size == 0:
+            yield memoryview(b'')
+            return
+        mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    view = memoryview(mapping)
+    try:
+        yield view
+    finally:
+
+        # Views into the map may still be held by reference cycles between the decoded structures, so collect them
+        # If the map is still in use (such as by the traceback of an exception), it is closed once it is released
+        view.release()
+        try:
+            mapping.close()
+        except BufferError:
+            gc.collect()
+            with suppress(BufferError):
+                mapping.close()
+
+
+# Gets the address of the conversion server, which can be changed with an environment variable
+def get_server_address() -> str:
+    return os.environ.get(SERVER_ADDRESS_VAR, SERVER_ADDRESS)
+
+
+# Converts a server address to a socket family and address
+# Addresses in the host:port form use TCP, while the others are Unix socket paths
+def get_socket_address(address: str) -> tuple[socket.AddressFamily, str | tuple[str, int]]:
+    host, separator, port = address.rpartition(':')
+    if separator and port.isdigit():
+        return socket.AF_INET, (host, int(port))
+    return socket.AF_UNIX, address
+
+
 # Aligns an integer to the given value
 def align(value: int, alignment: int) -> int:
     return (value + alignment - 1) & ~(alignment - 1)
@@ -4,9 +4,12 @@
 # Base field definitions.
 
 import struct
+import sys
 from enum import IntEnum, IntFlag
+from functools import cache
+from types import MemberDescriptorType, ModuleType
 from typing import Any, Callable, Callable, Optional, Type, TypeVar
-from common.common import align, pad, snake_to_camel, pascal_to_camel, camel_to_pascal, printv
+from common.common import align, snake_to_camel, pascal_to_camel
 
 ####################
 # Type Definitions #
@@ -19,6 +22,24 @@ F = TypeVar('F', bound='Field')
 FieldDict = dict[str, 'Field']
 FIELD_LIST = '_fields_'
 
+# Compiled codec plan container
+CodecPlan = list['FieldRun | str']
+CODEC_PLAN = '_codec_'
+
+# Position of each field in the codec plan (step index and end offset relative to the step's start, if not its last field)
+StepMap = dict[str, tuple[int, Optional[int]]]
+STEP_MAP = '_steps_'
+
+# JSON key of each field
+JsonKeyMap = dict[str, str]
+JSON_KEYS = '_keys_'
+
+# Cached binary layout (aligned end offset of each codec plan step)
+Layout = list[int]
+
+# Binary input, either a copy of the data or a view into it (such as a memory-mapped file)
+Buffer = bytes | bytearray | memoryview
+
 # Function to determine whether the field should be skipped
 FieldCondition = Callable[['Structure'], bool]
 
@@ -38,6 +59,101 @@ def skip_binary(structure: 'Structure', is_json: bool):
 def skip_all(structure: 'Structure', is_json: bool):
     return False
 
+# NumPy helper, returning None if it is not installed
+# NumPy is optional and slow to import, so it is only imported once array fields are used
+@cache
+def get_numpy() -> Optional[ModuleType]:
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+# Comparison helper, rejecting NumPy arrays as they are compared element-wise and cannot be hashed
+# Arrays only exist once NumPy has been imported, so this does not import it
+def check_comparable(value: Any) -> Any:
+    numpy = sys.modules.get('numpy')
+    if numpy is not None and isinstance(value, numpy.ndarray):
+        raise TypeError('Structures containing array fields cannot be compared or hashed!')
+    return value
+
+# Hash helper, converting lists (which cannot be hashed) to tuples
+def get_hashable(value: Any) -> Any:
+    if isinstance(value, list):
+        return tuple(get_hashable(item) for item in value)
+    return check_comparable(value)
+
+# Length helper
+def get_length(length: FieldLength, parent: Optional['Structure']) -> int:
+    if callable(length):
+        return length(parent)
+    elif isinstance(length, Field):
+        return getattr(parent, length.private_name)
+    return length
+
+#################
+# Binary Writer #
+#################
+
+class BinaryWriter:
+    """
+    Represents a growable output buffer that fields are packed into in place.
+    """
+    def __init__(self, size: int = 0) -> None:
+        """
+        Initializes the writer.
+
+        :param size: The expected size of the output, used to preallocate the buffer. Defaults to 0.
+        """
+        self.buffer = bytearray(size)
+        self.offset = 0
+
+    def reserve(self, size: int) -> None:
+        """
+        Ensures the buffer can hold the given amount of bytes past the current offset.
+        :param size: The amount of bytes to reserve.
+        """
+        end = self.offset + size
+        capacity = len(self.buffer)
+        if end > capacity:
+            self.buffer += bytes(max(end, capacity * 2) - capacity)
+
+    def pack(self, fmt: struct.Struct, *values: Any) -> None:
+        """
+        Packs the given values at the current offset.
+        :param fmt: The precompiled struct to pack the values with.
+        :param values: The values to be packed.
+        """
+        self.reserve(fmt.size)
+        fmt.pack_into(self.buffer, self.offset, *values)
+        self.offset += fmt.size
+
+    def write(self, data: Buffer) -> None:
+        """
+        Copies the given data at the current offset.
+        :param data: The data to be written.
+        """
+        end = self.offset + len(data)
+        self.reserve(len(data))
+        self.buffer[self.offset:end] = data
+        self.offset = end
+
+    def align(self, alignment: int) -> None:
+        """
+        Aligns the current offset. The skipped bytes are always zero, as the buffer is never written past the offset.
+        :param alignment: The alignment to be applied.
+        """
+        aligned_offset = align(self.offset, alignment)
+        self.reserve(aligned_offset - self.offset)
+        self.offset = aligned_offset
+
+    def getvalue(self) -> bytes:
+        """
+        Gets the written data.
+        :return: The written data.
+        """
+        return bytes(memoryview(self.buffer)[:self.offset])
+
 ###############
 # Field Types #
 ###############
@@ -58,22 +174,30 @@ class Field:
         :param cond: The condition to be verified to parse/export the field, defaults to None.
         """
         self.fmt = f'>{fmt}'
+        self.struct = struct.Struct(self.fmt)
         self.default = default
         self.default_factory = default_factory
         self.alignment = alignment
         self.cond = cond
         self.private_name = ''
 
-    def from_bytes(self, data: bytes, offset: int, parent: Optional['Structure'] = None) -> tuple[Any, int]:
+    def from_bytes(self, data: Buffer, offset: int, parent: Optional['Structure'] = None) -> tuple[Any, int]:
         """
         Converts the field from its binary representation.
         :param data: The data to be converted.
         :param offset: The offset to read the data from.
         :return: A tuple of the decoded data and the updated offset.
         """
-        size = self.size()
-        value = struct.unpack_from(self.fmt, data, offset)[0]
-        return value, offset + size
+        value = self.struct.unpack_from(data, offset)[0]
+        return self.from_raw(value), offset + self.struct.size
+
+    def from_raw(self, value: Any) -> Any:
+        """
+        Converts the raw value unpacked by the struct format to the field's value.
+        :param value: The unpacked value.
+        :return: The converted value.
+        """
+        return value
 
     def decode(self, value: Any) -> None:
         """
@@ -88,7 +212,23 @@ class Field:
         :param value: The data to be converted.
         :return: The converted data.
         """
-        return struct.pack(self.fmt, value)
+        return self.struct.pack(self.to_raw(value))
+
+    def write(self, writer: BinaryWriter, value: Any) -> None:
+        """
+        Writes the field's binary representation into the given writer.
+        :param writer: The writer to be filled.
+        :param value: The data to be converted.
+        """
+        writer.pack(self.struct, self.to_raw(value))
+
+    def to_raw(self, value: Any) -> Any:
+        """
+        Converts the field's value to the raw value packed by the struct format.
+        :param value: The value to be converted.
+        :return: The converted value.
+        """
+        return value
 
     def from_json(self, value: Any, parent: Optional['Structure'] = None) -> Any:
         """
@@ -119,7 +259,60 @@ class Field:
         :param instance: The instance of the field, for fields that require the value to calculate the size.
         :return: The calculated size.
         """
-        return struct.calcsize(self.fmt)
+        return self.struct.size
+
+    def is_fixed(self) -> bool:
+        """
+        Checks if the field is a fixed-size primitive that can be coalesced with its neighbours.
+        :return: Whether the field is always present in binary form and fully described by its struct format.
+        """
+        # Fields with their own binary codec cannot be coalesced, as the run would bypass it
+        is_plain = type(self).from_bytes is Field.from_bytes and type(self).write is Field.write
+        return is_plain and self.cond in (None, skip_json) and self.fmt != '>'
+
+
+class FieldRun:
+    """
+    Represents a run of consecutive fixed-size fields packed/unpacked with a single struct.
+    """
+    def __init__(self, fields: FieldDict) -> None:
+        """
+        Compiles the run.
+
+        :param fields: The fields in the run, in declaration order. Only the last one may have an alignment.
+        """
+        self.names = list(fields)
+        self.struct = struct.Struct('>' + ''.join(field.fmt[1:] for field in fields.values()))
+        self.alignment = list(fields.values())[-1].alignment
+
+        # Store the end offset of each field relative to the start of the run
+        self.ends: dict[str, int] = {}
+        end = 0
+        for name, field in fields.items():
+            end += field.struct.size
+            self.ends[name] = end
+
+        # Store the fields that produce a value (padding does not), skipping the conversion for plain values
+        self.items: list[tuple[str, Optional[Field]]] = []
+        for name, field in fields.items():
+            if len(field.struct.unpack(bytes(field.struct.size))) == 0:
+                continue
+            is_plain = type(field).from_raw is Field.from_raw and type(field).to_raw is Field.to_raw
+            self.items.append((name, None if is_plain else field))
+
+    def from_bytes(self, instance: 'Structure', data: Buffer, offset: int) -> int:
+        values = self.struct.unpack_from(data, offset)
+        for (name, field), value in zip(self.items, values):
+            object.__setattr__(instance, name, field.from_raw(value) if field else value)
+        return align(offset + self.struct.size, self.alignment)
+
+    def write(self, instance: 'Structure', writer: BinaryWriter) -> None:
+        values = []
+        for name, field in self.items:
+            value = getattr(instance, name)
+            values.append(field.to_raw(value) if field else value)
+        writer.pack(self.struct, *values)
+        writer.align(self.alignment)
 
 
 class StructureMeta(type):
@@ -137,42 +330,140 @@ class StructureMeta(type):
                 fields[k] = v
                 v.private_name = k
 
+        # Store the field values in slots instead of a per-instance dictionary, only adding the new ones
+        # Structures containing UnionFields also get a dictionary, used to hold their own copy of the field list
+        # Slots declared by the class itself are kept, for attributes that are not fields
+        slots = [k for k in fields if not any(hasattr(base, k) for base in bases)]
+        slots.extend(class_dict.get('__slots__', ()))
+        if any(isinstance(v, UnionField) for v in fields.values()) and all(not base.__dictoffset__ for base in bases):
+            slots.append('__dict__')
+        for k in slots:
+            class_dict.pop(k, None)
+        class_dict['__slots__'] = tuple(slots)
+
         # Continue
         class_dict[FIELD_LIST] = fields
+        class_dict[JSON_KEYS] = {k: snake_to_camel(k) for k in fields}
+        class_dict[CODEC_PLAN], class_dict[STEP_MAP] = cls.compile(fields)
         return super().__new__(cls, name, bases, class_dict)
 
+    def __getattribute__(cls, name: str) -> Any:
+
+        # Return the field itself rather than its slot when accessed from the class
+        value = super().__getattribute__(name)
+        if type(value) is MemberDescriptorType:
+            return super().__getattribute__(FIELD_LIST).get(name, value)
+        return value
+
+    @staticmethod
+    def compile(fields: FieldDict) -> tuple[CodecPlan, StepMap]:
+
+        # Coalesce consecutive fixed-size fields into runs, leaving every other field as a single step
+        # Fields that never appear in binary form are left out, and map to the end of the previous step
+        plan: CodecPlan = []
+        steps: StepMap = {}
+        run: FieldDict = {}
+        for name, field in fields.items():
+            if field.cond is skip_binary:
+                if run:
+                    steps[name] = (len(plan), sum(run_field.struct.size for run_field in run.values()))
+                else:
+                    steps[name] = (len(plan) - 1, None)
+                continue
+
+            if field.is_fixed():
+                run[name] = field
+            else:
+                StructureMeta.flush(plan, steps, run)
+                steps[name] = (len(plan), None)
+                plan.append(name)
+
+            # Alignment depends on the absolute offset, so it has to end the run
+            if field.alignment != 1:
+                StructureMeta.flush(plan, steps, run)
+
+        # Add the remaining run
+        StructureMeta.flush(plan, steps, run)
+        return plan, steps
+
+    @staticmethod
+    def flush(plan: CodecPlan, steps: StepMap, run: FieldDict) -> None:
+        if not run:
+            return
+
+        # Add the run to the plan and map its fields to it
+        step = FieldRun(run)
+        for name in step.names:
+            steps[name] = (len(plan), step.ends[name])
+        steps[step.names[-1]] = (len(plan), None)
+        plan.append(step)
+        run.clear()
+
 
 class Structure(metaclass=StructureMeta):
+    __slots__ = ('parent', '_layout_', '_hash_')
+
     def __init__(self, parent: Optional['Structure'] = None):
-        self.parent = parent
 
-        # Copy the field dictionary and set the default for each field
-        # This is necessary to account for fields that change depending on the context (like UnionFields)
-        fields = self._fields_
-        self._fields_: FieldDict = dict.copy(fields)
-        for name, field in fields.items():
+        # Fresh instances have no layout to invalidate, so bypass the check when filling fields here and while decoding
+        object.__setattr__(self, 'parent', parent)
+        object.__setattr__(self, '_layout_', None)
+        object.__setattr__(self, '_hash_', None)
+
+        # Set the default for each field
+        for name, field in self._fields_.items():
             if field.default_factory:
-                setattr(self, name, field.default_factory())
+                object.__setattr__(self, name, field.default_factory())
             else:
-                setattr(self, name, field.default)
+                object.__setattr__(self, name, field.default)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        super().__setattr__(name, value)
+
+        # Changing a field might change the binary layout
+        if name in self._fields_:
+            self.invalidate()
+
+    def __eq__(self, other: Any) -> bool:
+
+        # Structures are equal if they are of the same type and all their fields are equal
+        if type(self) is not type(other):
+            return NotImplemented
+        return all(check_comparable(getattr(self, name)) == check_comparable(getattr(other, name))
+                   for name in self._fields_)
+
+    def __hash__(self) -> int:
+
+        # Hash the type and every field, converting lists to tuples as they cannot be hashed
+        # The hash is cached until a field changes, like the layout, so it must not be used while the structure
+        # (or a structure it contains but is not the parent of) is still being modified
+        if self._hash_ is None:
+            values = tuple(get_hashable(getattr(self, name)) for name in self._fields_)
+            object.__setattr__(self, '_hash_', hash((type(self), values)))
+        return self._hash_
 
     @classmethod
-    def from_bytes(cls, data: bytes, offset: int = 0, parent: Optional['Structure'] = None) -> tuple['Structure', int]:
+    def from_bytes(cls, data: Buffer, offset: int = 0, parent: Optional['Structure'] = None) -> tuple['Structure', int]:
         instance = cls(parent)
         offset = instance._from_bytes(data, offset)
         return instance, offset
 
-    def _from_bytes(self, data: bytes, offset: int = 0) -> int:
-        for name, field in self._fields_.items():
+    def _from_bytes(self, data: Buffer, offset: int = 0) -> int:
+        for step in self._codec_:
+
+            # Decode runs of fixed-size fields in one go
+            if isinstance(step, FieldRun):
+                offset = step.from_bytes(self, data, offset)
+                continue
 
             # Skip field if cond does not match
+            name, field = step, self._fields_[step]
             if field.cond and not field.cond(self, False):
                 continue
 
             # Decode field and update offset
-            printv(f'Decoding field {name} (type {type(field).__name__}) at offset {hex(offset)}')
             value, offset = field.from_bytes(data, offset, self)
-            setattr(self, name, value)
+            object.__setattr__(self, name, value)
 
             # Align offset
             offset = align(offset, field.alignment)
@@ -205,7 +496,6 @@ class Structure(metaclass=StructureMeta):
                 continue
 
             # Get value and convert it
-            printv(f'Encoding field {name} (type {type(field).__name__})')
             value = getattr(self, name)
             json_value = field.to_json(value)
 
@@ -213,7 +503,7 @@ class Structure(metaclass=StructureMeta):
             if isinstance(field, StructField) and field.unroll:
                 result.update(json_value)
             else:
-                result[snake_to_camel(name)] = json_value
+                result[self._keys_[name]] = json_value
 
         # Return result
         return result
@@ -225,18 +515,18 @@ class Structure(metaclass=StructureMeta):
         return instance
 
     def _from_json(self, data: dict[str, Any]) -> None:
+        keys = self._keys_
         for name, field in self._fields_.items():
-            printv(f'Decoding field {name} (type {type(field).__name__})')
 
             # Defer decoding for UnionField since we don't know the underlying data structure at this stage
             if (isinstance(field, StructField) and field.unroll) or isinstance(field, UnionField):
-                setattr(self, name, field.from_json(data, self))
+                object.__setattr__(self, name, field.from_json(data, self))
 
             # Ignore conditions and read every field regardless
             # This is not safe as the user can override default/calculated values, but if the resulting
             # file is corrupted the user can be safely blamed for the error
-            elif (key := snake_to_camel(name)) in data:
-                setattr(self, name, field.from_json(data[key], self))
+            elif (key := keys[name]) in data:
+                object.__setattr__(self, name, field.from_json(data[key], self))
 
     def encode(self) -> None:
         for name, field in self._fields_.items():
@@ -254,26 +544,73 @@ class Structure(metaclass=StructureMeta):
         if self.parent is None:
             self.encode()
 
-        # Set up loop
-        result = b''
-        for name, field in self._fields_.items():
+        # Write the structure into a new buffer
+        writer = BinaryWriter()
+        self.write(writer)
+        return writer.getvalue()
+
+    def write(self, writer: BinaryWriter) -> None:
+        for step in self._codec_:
+
+            # Encode runs of fixed-size fields in one go
+            if isinstance(step, FieldRun):
+                step.write(self, writer)
+                continue
 
             # Skip field if cond does not match
+            name, field = step, self._fields_[step]
             if field.cond and not field.cond(self, False):
                 continue
 
             # Encode field and add necessary padding
             value = getattr(self, name)
-            printv(f'Encoding field {name} (type {type(field).__name__}) = {value}')
-            result += field.to_bytes(value)
-            result = pad(result, field.alignment)
-
-        # Return result
-        return result
+            field.write(writer, value)
+            writer.align(field.alignment)
+
+    def layout(self) -> Layout:
+
+        # Compute the aligned end offset of every step, skipped fields keep the previous offset
+        # Use binary conditions as sizes are irrelevant in the deserialized version
+        if self._layout_ is None:
+            layout: Layout = []
+            offset = 0
+            for step in self._codec_:
+                if isinstance(step, FieldRun):
+                    offset = align(offset + step.struct.size, step.alignment)
+                else:
+                    field = self._fields_[step]
+                    if field.cond is None or field.cond(self, False):
+                        offset = align(offset + field.size(getattr(self, step)), field.alignment)
+                layout.append(offset)
+            self._layout_ = layout
+
+        # Return the cached layout
+        return self._layout_
+
+    def invalidate(self) -> None:
+
+        # Clear the cached layout and hash of the structure and of every parent including it
+        # If neither is cached, neither are the ones of its parents, so the walk can stop there
+        # Fields modified in place (such as appending to a list) require calling this manually
+        current = self
+        while current is not None and (current._layout_ is not None or current._hash_ is not None):
+            current._layout_ = None
+            current._hash_ = None
+            current = current.parent
 
     def size(self, start_field: Optional[F] = None, end_field: Optional[F] = None, ignore_conds: bool = False) -> int:
 
-        # Set up loop
+        # Read the cached layout if possible
+        if start_field is None and not ignore_conds:
+            layout = self.layout()
+            if end_field and end_field.private_name in self._steps_:
+                index, end = self._steps_[end_field.private_name]
+                if end is not None:
+                    return (layout[index - 1] if index else 0) + end
+                return layout[index] if index >= 0 else 0
+            return layout[-1] if layout else 0
+
+        # Else set up loop
         result = 0
         found_start = start_field is None
         for field_name, field in self._fields_.items():
@@ -295,6 +632,16 @@ class Structure(metaclass=StructureMeta):
         # Return result
         return result
 
+    def set_field(self, name: str, field: Field) -> None:
+
+        # Copy the field dictionary on the first change, as it is shared with the class until then
+        # This is necessary to account for fields that change depending on the context (like UnionFields)
+        fields = self._fields_
+        if fields is type(self)._fields_:
+            fields = dict.copy(fields)
+            object.__setattr__(self, FIELD_LIST, fields)
+        fields[name] = field
+
     def get_parent(self, parent_type: Type[S]) -> S:
         current = self
         while current:
@@ -308,12 +655,19 @@ class padding(Field):
     def __init__(self, length: int) -> None:
         super().__init__(f'{length}x', default=0, cond=skip_json)
 
-    def from_bytes(self, data: bytes, offset: int, parent: Optional[Structure] = None) -> tuple[int, int]:
-        size = struct.calcsize(self.fmt)
-        return 0, offset + size
+    def from_bytes(self, data: Buffer, offset: int, parent: Optional[Structure] = None) -> tuple[int, int]:
+        return 0, offset + self.struct.size
 
     def to_bytes(self, value: Any) -> bytes:
-        return struct.pack(self.fmt)
+        return self.struct.pack()
+
+    def write(self, writer: BinaryWriter, value: Any) -> None:
+        writer.pack(self.struct)
+
+    def is_fixed(self) -> bool:
+
+        # Padding overrides the codec only because it has no value, which runs already skip
+        return self.cond in (None, skip_json)
 
 
 class s8(Field):
@@ -366,19 +720,17 @@ class raw(Field):
         super().__init__('', **kwargs)
         self.length = length
 
-    def from_bytes(self, data: bytes, offset: int, parent: Optional[Structure] = None) -> tuple[bytes, int]:
-        length = self.length
-        if callable(self.length):
-            length = self.length(parent)
-        elif isinstance(self.length, Field):
-            length = getattr(parent, self.length.private_name)
-
-        end = offset + length
-        return data[offset:end], end
+    def from_bytes(self, data: Buffer, offset: int, parent: Optional[Structure] = None) -> tuple[memoryview, int]:
+        # Return a view to avoid copying the data
+        end = offset + get_length(self.length, parent)
+        return memoryview(data)[offset:end], end
 
     def to_bytes(self, value: bytes) -> bytes:
         return value
 
+    def write(self, writer: BinaryWriter, value: bytes) -> None:
+        writer.write(value)
+
     def size(self, instance: Optional[bytes] = None) -> int:
         return len(instance) if instance else 0
 
@@ -387,14 +739,26 @@ class string(Field):
     def __init__(self, **kwargs) -> None:
         super().__init__('', **kwargs)
 
-    def from_bytes(self, data: bytes, offset: int, parent: Optional[Structure] = None) -> tuple[str, int]:
-        end = data.index(b'\0', offset)
-        value = data[offset:end].decode('ascii')
+    def from_bytes(self, data: Buffer, offset: int, parent: Optional[Structure] = None) -> tuple[str, int]:
+
+        # Views cannot be searched, so look for the terminator in increasingly larger copies of the following bytes
+        chunk_size = 64
+        while (length := bytes(data[offset:offset + chunk_size]).find(b'\0')) == -1:
+            if offset + chunk_size >= len(data):
+                raise ValueError(f'Unterminated string at offset {hex(offset)}')
+            chunk_size *= 2
+
+        # Decode the string
+        end = offset + length
+        value = bytes(data[offset:end]).decode('ascii')
         return value, end + 1
 
     def to_bytes(self, value: str) -> bytes:
         return value.encode('ascii') + b'\0'
 
+    def write(self, writer: BinaryWriter, value: str) -> None:
+        writer.write(self.to_bytes(value))
+
     def size(self, instance: Optional[str] = None) -> int:
         return len(instance) + 1 if instance else 1
 
@@ -404,36 +768,42 @@ class EnumField(Field):
         super().__init__(fmt, **kwargs)
         self.enum_type = enum_type
 
-    def from_bytes(self, data: bytes, offset: int, parent: Optional[Structure] = None) -> tuple[IntEnum, int]:
-        value, offset = super().from_bytes(data, offset, parent)
-        return self.enum_type(value), offset
+        # Map each member to its name and back
+        self.member_names = {member: member.name for member in enum_type}
+        self.members = dict(enum_type.__members__)
+
+    def from_raw(self, value: int) -> IntEnum:
+        return self.enum_type(value)
 
     def to_json(self, value: IntEnum) -> str:
-        return value.name
+        return self.member_names[value]
 
     def from_json(self, value: str, parent: Optional[Structure] = None) -> IntEnum:
-        return self.enum_type(self.enum_type[value])
+        return self.members[value]
 
-    def to_bytes(self, value: IntEnum) -> bytes:
-        return super().to_bytes(value.value)
+    def to_raw(self, value: IntEnum) -> int:
+        return value.value
 
 
 class FlagEnumField(EnumField):
     def __init__(self, enum_type: Type[IntFlag], fmt: str = 'B', **kwargs) -> None:
         super().__init__(enum_type, fmt, **kwargs)
 
+        # Map each flag to its JSON key and back (both casings are accepted when reading)
+        self.flag_keys = [(pascal_to_camel(flag.name), flag.value) for flag in enum_type]
+        self.flag_values = {name: member.value for name, member in enum_type.__members__.items()}
+        self.flag_values.update({pascal_to_camel(name): value for name, value in self.flag_values.items()})
+
     def to_json(self, value: IntFlag) -> dict[str, bool]:
-        result = {}
-        for flag in self.enum_type:
-            result[pascal_to_camel(flag.name)] = bool(flag & value)
-        return result
+        value = int(value)
+        return {key: bool(flag & value) for key, flag in self.flag_keys}
 
     def from_json(self, value: dict[str, bool], parent: Optional[Structure] = None) -> IntFlag:
-        result = self.enum_type(self.default if self.default else 0)
+        result = self.default if self.default else 0
         for flag_name, is_set in value.items():
             if is_set:
-                result |= self.enum_type[camel_to_pascal(flag_name)]
-        return result
+                result |= self.flag_values[flag_name]
+        return self.enum_type(result)
 
 
 class StructField(Field):
@@ -442,7 +812,7 @@ class StructField(Field):
         self.struct_type = struct_type
         self.unroll = unroll
 
-    def from_bytes(self, data: bytes, offset: int, parent: Optional[Structure] = None) -> tuple[Structure, int]:
+    def from_bytes(self, data: Buffer, offset: int, parent: Optional[Structure] = None) -> tuple[Structure, int]:
         return self.struct_type.from_bytes(data, offset, parent)
 
     def decode(self, value: Structure) -> None:
@@ -460,6 +830,9 @@ class StructField(Field):
     def to_bytes(self, value: Structure) -> bytes:
         return value.to_bytes() if value else b''
 
+    def write(self, writer: BinaryWriter, value: Structure) -> None:
+        value.write(writer) if value else None
+
     def size(self, instance: Optional[Structure] = None) -> int:
         return instance.size() if instance else 0
 
@@ -471,12 +844,13 @@ class UnionField(Field):
 
     def detect_field(self, parent: Structure, is_json: bool) -> Field:
         selected_field = self.type_selector(parent, is_json)
-        parent._fields_[self.private_name] = selected_field
+        parent.set_field(self.private_name, selected_field)
         selected_field.cond = self.cond
         selected_field.private_name = self.private_name
+        parent.invalidate()
         return selected_field
 
-    def from_bytes(self, data: bytes, offset: int, parent: Optional[Structure] = None) -> tuple[Any, int]:
+    def from_bytes(self, data: Buffer, offset: int, parent: Optional[Structure] = None) -> tuple[Any, int]:
         if not parent:
             raise ValueError('A parent is required for decoding a UnionField!')
         return self.detect_field(parent, False).from_bytes(data, offset, parent)
@@ -495,7 +869,7 @@ class UnionField(Field):
         field = self.detect_field(parent, True)
         if isinstance(field, StructField) and field.unroll:
             return field.from_json(value, parent)
-        elif (key := snake_to_camel(self.private_name)) in value:
+        elif (key := parent._keys_[self.private_name]) in value:
             return field.from_json(value[key], parent)
         elif field.default_factory:
             return field.default_factory()
@@ -507,6 +881,9 @@ class UnionField(Field):
     def to_bytes(self, value: Any) -> bytes:
         raise NotImplementedError('UnionField should not call to_bytes() directly; it must be replaced by the selected field.')
 
+    def write(self, writer: BinaryWriter, value: Any) -> None:
+        raise NotImplementedError('UnionField should not call write() directly; it must be replaced by the selected field.')
+
     def size(self, instance: Optional[Structure] = None) -> int:
         raise NotImplementedError('UnionField should not call size() directly; it must be replaced by the selected field.')
 
@@ -517,18 +894,28 @@ class ListField(Field):
         self.item_field = item_field
         self.length = length
 
-    def from_bytes(self, data: bytes, offset: int, parent: Optional[Structure] = None) -> tuple[list, int]:
+        # Lists of fixed-size primitives are converted with a single struct format for the whole list
+        # Cache the format for each list length, as it usually only takes a few different values
+        self.is_bulk = item_field.is_fixed()
+        self.is_plain = type(item_field).from_raw is Field.from_raw and type(item_field).to_raw is Field.to_raw
+        self.bulk_structs: dict[int, struct.Struct] = {}
+
+    def from_bytes(self, data: Buffer, offset: int, parent: Optional[Structure] = None) -> tuple[list, int]:
 
         # Ensure parent exists
         if not parent:
             raise ValueError('A parent is required for decoding a ListField!')
 
         # Get the length
-        length = self.length
-        if callable(self.length):
-            length = self.length(parent)
-        elif isinstance(self.length, Field):
-            length = getattr(parent, self.length.private_name)
+        length = get_length(self.length, parent)
+
+        # Unpack primitive lists in one go
+        if self.is_bulk:
+            bulk_struct = self.get_bulk_struct(length)
+            value = list(bulk_struct.unpack_from(data, offset))
+            if not self.is_plain:
+                value = [self.item_field.from_raw(item) for item in value]
+            return value, offset + bulk_struct.size
 
         # Parsing loop
         value = []
@@ -556,13 +943,173 @@ class ListField(Field):
             self.item_field.encode(item)
 
     def to_bytes(self, value: list) -> bytes:
-        return b''.join(self.item_field.to_bytes(item) for item in value)
+        writer = BinaryWriter()
+        self.write(writer, value)
+        return writer.getvalue()
+
+    def write(self, writer: BinaryWriter, value: list) -> None:
+
+        # Pack primitive lists in one go
+        if self.is_bulk:
+            if not self.is_plain:
+                value = [self.item_field.to_raw(item) for item in value]
+            writer.pack(self.get_bulk_struct(len(value)), *value)
+            return
+
+        for item in value:
+            self.item_field.write(writer, item)
+
+    def get_bulk_struct(self, length: int) -> struct.Struct:
+
+        # Repeat the item format for the given length (single character formats can use a repeat count instead)
+        if (bulk_struct := self.bulk_structs.get(length)) is None:
+            item_fmt = self.item_field.fmt[1:]
+            bulk_fmt = f'>{length}{item_fmt}' if len(item_fmt) == 1 else f'>{item_fmt * length}'
+            bulk_struct = self.bulk_structs[length] = struct.Struct(bulk_fmt)
+        return bulk_struct
 
     def size(self, instance: Optional[list] = None) -> int:
         result = 0
         if not instance:
             return result
 
+        # Primitive items all have the same size
+        if self.is_bulk:
+            return len(instance) * self.item_field.struct.size
+
         for item in instance:
             result += self.item_field.size(item)
         return result
+
+
+class ArrayField(Field):
+    def __init__(self, item_field: F, rows: FieldLength = 0, columns: FieldLength = 1, **kwargs) -> None:
+        super().__init__('', None, None, **kwargs)
+        self.numpy = get_numpy()
+        if self.numpy is None:
+            raise ImportError('NumPy is required for array fields!')
+
+        # Store the values as a two-dimensional array using the item's format
+        self.dtype = self.numpy.dtype(item_field.fmt)
+        self.rows = rows
+        self.columns = columns
+
+    def from_bytes(self, data: Buffer, offset: int, parent: Optional[Structure] = None) -> tuple[Any, int]:
+
+        # Ensure parent exists
+        if not parent:
+            raise ValueError('A parent is required for decoding an ArrayField!')
+
+        # Create the array directly from the data, without copying it
+        rows, columns = get_length(self.rows, parent), get_length(self.columns, parent)
+        value = self.numpy.frombuffer(data, self.dtype, rows * columns, offset).reshape(rows, columns)
+        return value, offset + value.nbytes
+
+    def to_json(self, value: Any) -> list[list[Any]]:
+        return value.tolist()
+
+    def from_json(self, value: list[list[Any]], parent: Optional[Structure] = None) -> Any:
+        return self.numpy.array(value, self.dtype)
+
+    def to_bytes(self, value: Any) -> bytes:
+        return value.astype(self.dtype, copy=False).tobytes()
+
+    def write(self, writer: BinaryWriter, value: Any) -> None:
+        writer.write(self.to_bytes(value))
+
+    def size(self, instance: Any = None) -> int:
+        return instance.size * self.dtype.itemsize if instance is not None else 0
+
+
+###########
+# Tracing #
+###########
+
+# Function to describe a traced call (or return None to hide it)
+TraceDescriber = Callable[..., Optional[str]]
+
+# Current nesting level of the traced calls
+trace_depth = 0
+
+def traced(method: Callable, action: str, describe: TraceDescriber) -> Callable:
+    def wrapper(self, *args, **kwargs):
+        global trace_depth
+        description = describe(self, *args)
+        if description is None:
+            return method(self, *args, **kwargs)
+
+        # Print the call indented by its nesting level, then run it
+        print(f'{"  " * trace_depth}{action} {description}')
+        trace_depth += 1
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            trace_depth -= 1
+
+    wrapper.is_traced = True
+    wrapper.method = method
+    return wrapper
+
+
+def describe_field(field: Field, value: Any = None, *args) -> Optional[str]:
+
+    # List items do not have a name and are already covered by the list itself
+    if field.private_name:
+        return f'field {field.private_name} (type {type(field).__name__})'
+
+
+def describe_field_at(field: Field, data: Buffer, offset: int, *args) -> Optional[str]:
+    if description := describe_field(field):
+        return f'{description} at offset {hex(offset)}'
+
+
+def describe_field_write(field: Field, writer: BinaryWriter, *args) -> Optional[str]:
+    if description := describe_field(field):
+        return f'{description} at offset {hex(writer.offset)}'
+
+
+def describe_run_at(run: FieldRun, instance: Structure, data: Buffer, offset: int) -> str:
+    return f'fields {", ".join(run.names)} at offset {hex(offset)}'
+
+
+def describe_run_write(run: FieldRun, instance: Structure, writer: BinaryWriter) -> str:
+    return f'fields {", ".join(run.names)} at offset {hex(writer.offset)}'
+
+
+def enable_tracing() -> None:
+
+    # Collect every field type defined so far
+    field_types = [Field]
+    for field_type in field_types:
+        field_types.extend(field_type.__subclasses__())
+
+    # Wrap the codec methods each type defines, so that the regular code paths never pay for tracing
+    methods = [
+        ('from_bytes', 'Decoding', describe_field_at),
+        ('write', 'Encoding', describe_field_write),
+        ('to_json', 'Exporting', describe_field),
+        ('from_json', 'Importing', describe_field),
+    ]
+    for field_type in field_types:
+        for name, action, describe in methods:
+            method = field_type.__dict__.get(name)
+            if method and not hasattr(method, 'is_traced'):
+                setattr(field_type, name, traced(method, action, describe))
+
+    # Wrap the field runs as well
+    if not hasattr(FieldRun.from_bytes, 'is_traced'):
+        FieldRun.from_bytes = traced(FieldRun.from_bytes, 'Decoding', describe_run_at)
+        FieldRun.write = traced(FieldRun.write, 'Encoding', describe_run_write)
+
+
+def disable_tracing() -> None:
+
+    # Restore the original codec methods of every field type and of the field runs
+    field_types = [Field]
+    for field_type in field_types:
+        field_types.extend(field_type.__subclasses__())
+    for field_type in [*field_types, FieldRun]:
+        for name in ('from_bytes', 'write', 'to_json', 'from_json'):
+            method = field_type.__dict__.get(name)
+            if method and hasattr(method, 'is_traced'):
+                setattr(field_type, name, method.method)
@@ -22,7 +22,7 @@ class EffectTableEntry(Structure):
     data = raw(length=data_size, cond=skip_all) # Handled manually
 
     @classmethod
-    def from_bytes(cls, data: bytes, offset: int = 0, parent: Optional[Structure] = None) -> tuple[Structure, int]:
+    def from_bytes(cls, data: Buffer, offset: int = 0, parent: Optional[Structure] = None) -> tuple[Structure, int]:
         instance, offset = super().from_bytes(data, offset, parent)
         instance.data = cls.data.from_bytes(data, instance.data_offset, instance)[0]
         return instance, offset
@@ -57,8 +57,10 @@ class EffectTable(Structure):
             entry.data_offset = data_offset
             data_offset += entry.data_size
 
-    def to_bytes(self) -> bytes:
-        return super().to_bytes() + b''.join(entry.data for entry in self.entries)
+    def write(self, writer: BinaryWriter) -> None:
+        super().write(writer)
+        for entry in self.entries:
+            writer.write(entry.data)
 
 
 class EffectProject(Structure):
@@ -98,3 +100,11 @@ class BinaryFileHeader(Structure):
     def encode(self) -> None:
         super().encode()
         self.file_length = self.size()
+
+    def to_bytes(self) -> bytes:
+
+        # Encode first, so the file length can be used to preallocate the whole output
+        self.encode()
+        writer = BinaryWriter(self.file_length)
+        self.write(writer)
+        return writer.getvalue()
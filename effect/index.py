@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+
+# index.py
+# Lazy effect index definitions
+
+from fnmatch import fnmatchcase
+from typing import Optional
+from common.field import Buffer
+from effect.effect import BinaryFileHeader, BinaryBlockHeader, EffectTable, EffectTableEntry, Effect
+
+class EffectIndex:
+    """
+    Provides access to the effects of a BREFF file without decoding them upfront.
+    """
+    def __init__(self, data: Buffer) -> None:
+        """
+        Parses the file header and the effect table.
+
+        :param data: The BREFF file data. Effect data is not copied, but referenced through views.
+        """
+        self.header: BinaryFileHeader = BinaryFileHeader.from_bytes(data)[0]
+        self.table: EffectTable = EffectTable.from_bytes(self.header.block.project.project_data)[0]
+        self.entries: list[EffectTableEntry] = self.table.entries
+
+        # Get the offset of the effect table in the file, to report the absolute offset of each effect
+        block_header_size = self.header.block.size(end_field=BinaryBlockHeader.block_size)
+        self.table_offset = self.header.header_length + block_header_size + self.header.block.project.project_header_size
+
+    def get_offset(self, entry: EffectTableEntry) -> int:
+        """
+        Gets the absolute offset of an effect in the file.
+
+        :param entry: The effect's table entry.
+        """
+        return self.table_offset + entry.data_offset
+
+    def select(self, patterns: Optional[list[str]] = None) -> list[EffectTableEntry]:
+        """
+        Gets the entries whose names match any of the given patterns, in table order.
+
+        :param patterns: The effect names or glob patterns to match, defaults to None (all effects).
+        """
+        if not patterns:
+            return self.entries
+        return [entry for entry in self.entries if any(fnmatchcase(entry.name.name, pattern) for pattern in patterns)]
+
+    def decode(self, entry: EffectTableEntry) -> Effect:
+        """
+        Decodes an effect.
+
+        :param entry: The effect's table entry.
+        """
+        return Effect.from_bytes(entry.data)[0]